@@ -0,0 +1,202 @@
+from typing import Iterator, Optional
+
+from PyQt5.QtWidgets import QDockWidget, QListView, QWidget
+from PyQt5.QtGui import QColor, QFont
+from PyQt5.QtCore import (
+    Qt, QThread, QAbstractListModel, QModelIndex, QVariant, pyqtSignal
+)
+
+from FileIO import read_text
+from TextDiff import Opcode, diff_lines
+
+
+class DiffWorker(QThread):
+    """Поток, который сравнивает текст буфера с файлом на диске."""
+
+    diff_ready = pyqtSignal(list, list, list, bool)
+    diff_failed = pyqtSignal(str)
+
+    def __init__(self, file_path: str, new_text: str, timeout: float = 0.5) -> None:
+        """
+        Инициализация потока.
+
+        :param file_path: Путь к файлу на диске.
+        :param new_text: Текст буфера редактора.
+        :param timeout: Ограничение времени сравнения в секундах.
+        """
+        super().__init__()
+        self.file_path = file_path
+        self.new_text = new_text
+        self.timeout = timeout
+
+    def run(self) -> None:
+        """Читает файл, выполняет сравнение и отправляет результат сигналом diff_ready."""
+        try:
+            old_text, _ = read_text(self.file_path)
+            old_lines = old_text.splitlines()
+            new_lines = self.new_text.splitlines()
+            opcodes, exact = diff_lines(old_lines, new_lines, self.timeout)
+        except Exception as error:
+            self.diff_failed.emit(str(error))
+            return
+        self.diff_ready.emit(old_lines, new_lines, opcodes, exact)
+
+
+class DiffModel(QAbstractListModel):
+    """Модель строк диффа, которая формирует строки по мере прокрутки."""
+
+    BATCH_SIZE = 200
+    CONTEXT = 3
+
+    COLORS = {
+        '-': QColor(255, 220, 220),
+        '+': QColor(220, 255, 220),
+        '@': QColor(220, 230, 255),
+    }
+
+    def __init__(self, old_lines: list[str], new_lines: list[str],
+                 opcodes: list[Opcode], parent: Optional[QWidget] = None) -> None:
+        """
+        Инициализация модели.
+
+        :param old_lines: Строки файла на диске.
+        :param new_lines: Строки буфера редактора.
+        :param opcodes: Операции сравнения в формате difflib.
+        :param parent: Родительский объект, по умолчанию None.
+        """
+        super().__init__(parent)
+        self._rows: list[str] = []
+        self._source = self._generate_rows(old_lines, new_lines, opcodes)
+        self._exhausted = False
+
+    def _generate_rows(self, old_lines: list[str], new_lines: list[str],
+                       opcodes: list[Opcode]) -> Iterator[str]:
+        """
+        Лениво формирует строки в формате unified diff.
+
+        :return: Итератор строк диффа.
+        """
+        need_header = True
+        last = len(opcodes) - 1
+        for index, (tag, i1, i2, j1, j2) in enumerate(opcodes):
+            if tag == 'equal':
+                # Неизмененные участки сворачиваются до нескольких строк контекста
+                before = self.CONTEXT if index > 0 else 0
+                after = self.CONTEXT if index < last else 0
+                if i2 - i1 > before + after:
+                    yield from ("  " + line for line in old_lines[i1:i1 + before])
+                    need_header = True
+                    i1, j1 = i2 - after, j2 - after
+                if i1 == i2:
+                    continue
+            # Каждый фрагмент изменений начинается с заголовка с номерами строк
+            if need_header:
+                yield f"@@ -{i1 + 1} +{j1 + 1} @@"
+                need_header = False
+            if tag == 'equal':
+                yield from ("  " + line for line in old_lines[i1:i2])
+            else:
+                yield from ("- " + line for line in old_lines[i1:i2])
+                yield from ("+ " + line for line in new_lines[j1:j2])
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """Возвращает количество уже сформированных строк."""
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        """Возвращает текст или цвет фона строки диффа."""
+        if not index.isValid():
+            return QVariant()
+        row = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return row
+        if role == Qt.BackgroundRole and row[:1] in self.COLORS:
+            return self.COLORS[row[:1]]
+        return QVariant()
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        """Проверяет, остались ли несформированные строки."""
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent: QModelIndex) -> None:
+        """Формирует следующую порцию строк."""
+        batch = []
+        for row in self._source:
+            batch.append(row)
+            if len(batch) >= self.BATCH_SIZE:
+                break
+        else:
+            self._exhausted = True
+        if batch:
+            self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(batch) - 1)
+            self._rows.extend(batch)
+            self.endInsertRows()
+
+
+class DiffPanel(QDockWidget):
+    """Боковая панель с отличиями буфера от файла на диске."""
+
+    def __init__(self, parent: Optional[QWidget] = None) -> None:
+        """
+        Инициализация панели.
+
+        :param parent: Родительский виджет, по умолчанию None.
+        """
+        super().__init__("Diff", parent)
+        self.list_view = QListView(self)
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setFont(QFont("Courier New", 14))
+        self.setWidget(self.list_view)
+        self.worker: Optional[DiffWorker] = None
+        self._running: list[DiffWorker] = []
+
+    def compare(self, file_path: str, new_text: str) -> None:
+        """
+        Запускает чтение файла и сравнение в отдельном потоке.
+
+        :param file_path: Путь к файлу на диске.
+        :param new_text: Текст буфера редактора.
+        """
+        if self.worker is not None and self.worker.isRunning():
+            # Устаревший результат не отображается, но поток живет до завершения
+            self.worker.diff_ready.disconnect(self.show_diff)
+            self.worker.diff_failed.disconnect(self.show_error)
+        self.worker = DiffWorker(file_path, new_text)
+        self.worker.diff_ready.connect(self.show_diff)
+        self.worker.diff_failed.connect(self.show_error)
+        self._running = [worker for worker in self._running if not worker.isFinished()]
+        self._running.append(self.worker)
+        self.worker.start()
+        self.setWindowTitle("Diff: comparing...")
+        self.show()
+
+    def stop(self) -> None:
+        """Дожидается завершения всех потоков сравнения, например перед закрытием окна."""
+        for worker in self._running:
+            worker.wait()
+        self._running = []
+        self.worker = None
+
+    def show_error(self, message: str) -> None:
+        """
+        Сообщает об ошибке чтения файла или сравнения.
+
+        :param message: Текст ошибки.
+        """
+        self.list_view.setModel(None)
+        self.setWindowTitle(f"Diff: {message}")
+
+    def show_diff(self, old_lines: list[str], new_lines: list[str],
+                  opcodes: list[Opcode], exact: bool) -> None:
+        """
+        Отображает результат сравнения.
+
+        :param old_lines: Строки файла на диске.
+        :param new_lines: Строки буфера редактора.
+        :param opcodes: Операции сравнения в формате difflib.
+        :param exact: False, если использовался грубый дифф из-за таймаута.
+        """
+        self.list_view.setModel(DiffModel(old_lines, new_lines, opcodes, self.list_view))
+        changes = sum(1 for tag, *_ in opcodes if tag != 'equal')
+        title = f"Diff: {changes} changes"
+        self.setWindowTitle(title if exact else title + " (coarse)")
@@ -0,0 +1,391 @@
+import bz2
+import codecs
+import gzip
+import locale
+import lzma
+import os
+import re
+import tempfile
+from contextlib import ExitStack
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, Optional
+
+
+CHUNK_SIZE = 64 * 1024
+SAMPLE_SIZE = 64 * 1024
+
+# Сигнатуры сжатых форматов и расширения, по которым формат выбирается при сохранении
+MAGIC_NUMBERS = {
+    b'\x1f\x8b': 'gzip',
+    b'\xfd7zXZ\x00': 'xz',
+    b'BZh': 'bz2',
+}
+EXTENSIONS = {
+    '.gz': 'gzip',
+    '.xz': 'xz',
+    '.bz2': 'bz2',
+}
+
+# Порядок важен: BOM UTF-32-LE начинается с BOM UTF-16-LE
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+
+
+@dataclass
+class FileFormat:
+    """Формат файла на диске, который нужно сохранить при записи."""
+
+    compression: Optional[str] = None
+    encoding: str = 'utf-8'
+    bom: bytes = b''
+    newline: Optional[str] = None
+    # При чтении часть байтов не декодировалась и была заменена на U+FFFD
+    lossy: bool = False
+
+
+def detect_compression(file_path: str) -> Optional[str]:
+    """
+    Определяет формат сжатия по сигнатуре в начале файла.
+
+    :param file_path: Путь к файлу.
+    :return: 'gzip', 'xz', 'bz2' или None для несжатого файла.
+    """
+    with open(file_path, 'rb') as file:
+        head = file.read(6)
+    for magic, compression in MAGIC_NUMBERS.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def compression_from_extension(file_path: str) -> Optional[str]:
+    """
+    Определяет формат сжатия по расширению файла.
+
+    :param file_path: Путь к файлу.
+    :return: 'gzip', 'xz', 'bz2' или None.
+    """
+    return EXTENSIONS.get(os.path.splitext(file_path)[1].lower())
+
+
+def _open_stream(file: BinaryIO, mode: str, compression: Optional[str],
+                 name: str = '') -> BinaryIO:
+    """
+    Оборачивает файл в потоковый (де)компрессор.
+
+    :param file: Открытый двоичный файл.
+    :param mode: 'rb' или 'wb'.
+    :param compression: Формат сжатия или None.
+    :param name: Имя файла для заголовка gzip.
+    :return: Двоичный поток несжатых данных.
+    """
+    if compression == 'gzip':
+        return gzip.GzipFile(filename=name, mode=mode, fileobj=file)
+    if compression == 'xz':
+        return lzma.LZMAFile(file, mode=mode)
+    if compression == 'bz2':
+        return bz2.BZ2File(file, mode=mode)
+    return file
+
+
+def _candidate_encodings() -> list[str]:
+    """Возвращает однобайтовые кодировки, которые пробуются для файлов без BOM."""
+    candidates = []
+    for encoding in ('cp1251', locale.getpreferredencoding(False), 'latin-1'):
+        name = codecs.lookup(encoding).name
+        if name != 'utf-8' and name not in candidates:
+            candidates.append(name)
+    return candidates
+
+
+def _looks_cyrillic(text: str) -> bool:
+    """
+    Проверяет, что текст в cp1251 действительно русский, а не латиница с диакритикой.
+
+    В cp1251 байты 0xC0–0xFF — кириллица, поэтому «Café» превращается в «Cafй».
+    Такие слова смешивают алфавиты, а в настоящем русском тексте слова либо
+    целиком кириллические, либо целиком латинские.
+
+    :param text: Декодированный образец.
+    :return: True, если кириллических слов больше, чем смешанных.
+    """
+    pure = mixed = 0
+    for word in re.findall(r'[^\W\d_]+', text):
+        if not re.search('[а-яёА-ЯЁ]', word):
+            continue
+        if re.search('[a-zA-Z]', word):
+            mixed += 1
+        else:
+            pure += 1
+    return pure > mixed
+
+
+def detect_encoding(sample: bytes) -> tuple[str, bytes]:
+    """
+    Определяет кодировку по BOM или по началу файла.
+
+    Без BOM образец декодируется как UTF-8 (с учетом обрезанного на границе
+    символа). Затем пробуется cp1251, но только если в образце преобладают
+    кириллические слова, потом кодировка системы; latin-1 подходит всегда.
+
+    :param sample: Первые байты несжатого содержимого файла.
+    :return: Кодировка и найденный BOM (пустой, если его нет).
+    """
+    for bom, encoding in BOMS:
+        if sample.startswith(bom):
+            return encoding, bom
+
+    # Текст в UTF-16 без BOM: нулевые байты у латиницы стоят через один
+    if b'\x00' in sample:
+        even_zeros = sample[0::2].count(0)
+        odd_zeros = sample[1::2].count(0)
+        if odd_zeros > len(sample) // 4 and even_zeros < odd_zeros // 8:
+            return 'utf-16-le', b''
+        if even_zeros > len(sample) // 4 and odd_zeros < even_zeros // 8:
+            return 'utf-16-be', b''
+
+    for encoding in ['utf-8'] + _candidate_encodings():
+        try:
+            text = codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+        except UnicodeDecodeError:
+            continue
+        if encoding == 'cp1251' and not _looks_cyrillic(text):
+            continue
+        return encoding, b''
+    return 'latin-1', b''
+
+
+def detect_newline(text: str) -> Optional[str]:
+    """
+    Определяет разделитель строк по первому найденному переводу строки.
+
+    :param text: Начало текста файла.
+    :return: '\\r\\n', '\\r', '\\n' или None, если переводов строки нет.
+    """
+    for index, char in enumerate(text):
+        if char == '\r':
+            return '\r\n' if text[index + 1:index + 2] == '\n' else '\r'
+        if char == '\n':
+            return '\n'
+    return None
+
+
+class TextReader:
+    """Потоковое чтение текстового файла с распаковкой и декодированием по частям."""
+
+    def __init__(self, file_path: str, chunk_size: int = CHUNK_SIZE) -> None:
+        """
+        Открывает файл и определяет его формат по первым SAMPLE_SIZE байтам.
+
+        :param file_path: Путь к файлу.
+        :param chunk_size: Размер читаемых за раз несжатых данных в байтах.
+        """
+        self.chunk_size = chunk_size
+        self._stack = ExitStack()
+        try:
+            compression = detect_compression(file_path)
+            try:
+                self._sample = self._open(file_path, compression)
+            except (OSError, lzma.LZMAError):
+                if compression is None:
+                    raise
+                # Обычный текст может случайно начинаться с сигнатуры сжатого формата
+                self._stack.close()
+                compression = None
+                self._sample = self._open(file_path, compression)
+            encoding, bom = detect_encoding(self._sample)
+            self._sample = self._sample[len(bom):]
+            self._decoder = codecs.getincrementaldecoder(encoding)()
+            sample_text = codecs.getincrementaldecoder(encoding)(errors='replace').decode(self._sample)
+            if sample_text.endswith('\r'):
+                # '\r\n' мог разделиться на границе образца: дочитывается следующий символ
+                self._sample += self._stream.read(4)
+                sample_text = codecs.getincrementaldecoder(encoding)(errors='replace').decode(self._sample)
+        except BaseException:
+            self._stack.close()
+            raise
+        self.format = FileFormat(compression, encoding, bom, detect_newline(sample_text))
+
+    def _open(self, file_path: str, compression: Optional[str]) -> bytes:
+        """
+        Открывает поток несжатых данных и читает из него образец.
+
+        :param file_path: Путь к файлу.
+        :param compression: Формат сжатия или None.
+        :return: Первые SAMPLE_SIZE байтов несжатых данных.
+        """
+        raw = self._stack.enter_context(open(file_path, 'rb'))
+        self._stream = self._stack.enter_context(_open_stream(raw, 'rb', compression))
+        return self._stream.read(SAMPLE_SIZE)
+
+    def _decode(self, data: bytes, final: bool) -> str:
+        """
+        Декодирует часть данных, отмечая в формате файла недекодируемые байты.
+
+        :param data: Очередная часть несжатых данных.
+        :param final: True для последней части.
+        :return: Декодированный текст.
+        """
+        try:
+            return self._decoder.decode(data, final=final)
+        except UnicodeDecodeError:
+            # Неудачный вызов не меняет состояние декодера, поэтому часть декодируется повторно
+            self.format.lossy = True
+            self._decoder.errors = 'replace'
+            try:
+                return self._decoder.decode(data, final=final)
+            finally:
+                self._decoder.errors = 'strict'
+
+    def chunks(self) -> Iterator[str]:
+        """
+        Возвращает текст файла по частям с переводами строк, приведенными к '\\n'.
+
+        Недекодируемые байты заменяются на U+FFFD, а format.lossy становится True.
+
+        :return: Итератор частей текста.
+        """
+        data = self._sample
+        pending_cr = ''
+        while True:
+            final = not data
+            text = pending_cr + self._decode(data, final)
+            # '\r' в конце части может оказаться началом '\r\n' в следующей
+            pending_cr = '' if final or not text.endswith('\r') else '\r'
+            if pending_cr:
+                text = text[:-1]
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+            if text:
+                yield text
+            if final:
+                return
+            data = self._stream.read(self.chunk_size)
+
+    def close(self) -> None:
+        """Закрывает файл."""
+        self._stack.close()
+
+    def __enter__(self) -> 'TextReader':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def read_text(file_path: str) -> tuple[str, FileFormat]:
+    """
+    Читает файл целиком.
+
+    :param file_path: Путь к файлу.
+    :return: Текст файла и его формат.
+    """
+    with TextReader(file_path) as reader:
+        return ''.join(reader.chunks()), reader.format
+
+
+def _encode_chunks(text: str, file_format: FileFormat, chunk_size: int) -> Iterator[bytes]:
+    """
+    Кодирует текст по частям, начиная с BOM.
+
+    :param text: Текст с переводами строк '\\n'.
+    :param file_format: Формат записи.
+    :param chunk_size: Размер кодируемых за раз частей текста в символах.
+    :return: Итератор закодированных частей.
+    """
+    newline = file_format.newline or os.linesep
+    encoder = codecs.getincrementalencoder(file_format.encoding)()
+    yield file_format.bom
+    for start in range(0, len(text), chunk_size):
+        chunk = text[start:start + chunk_size]
+        if newline != '\n':
+            chunk = chunk.replace('\n', newline)
+        yield encoder.encode(chunk)
+    yield encoder.encode('', final=True)
+
+
+def _write_stream(file: BinaryIO, file_path: str, text: str,
+                  file_format: FileFormat, chunk_size: int) -> None:
+    """
+    Сжимает и записывает закодированный текст в открытый двоичный файл.
+
+    :param file: Открытый для записи двоичный файл.
+    :param file_path: Путь к целевому файлу, его имя попадает в заголовок gzip.
+    :param text: Текст с переводами строк '\\n'.
+    :param file_format: Формат записи.
+    :param chunk_size: Размер кодируемых за раз частей текста в символах.
+    """
+    with _open_stream(file, 'wb', file_format.compression, os.path.basename(file_path)) as stream:
+        for data in _encode_chunks(text, file_format, chunk_size):
+            stream.write(data)
+
+
+def _replace_via_temp(file_path: str, text: str, file_format: FileFormat,
+                      chunk_size: int) -> bool:
+    """
+    Записывает текст во временный файл рядом с целевым и подменяет им целевой.
+
+    :return: False, если подмена изменила бы файл иначе, чем его содержимое:
+             разорвала бы жесткие ссылки, сменила бы владельца, обошла бы
+             запрет на запись в файл или каталог недоступен для записи.
+    """
+    stat = os.stat(file_path) if os.path.exists(file_path) else None
+    if stat is not None and (stat.st_nlink > 1 or not os.access(file_path, os.W_OK)):
+        # Такие файлы пишутся на месте; если файл только для чтения, open(path, 'wb') даст PermissionError
+        return False
+    try:
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), prefix='.', suffix='.tmp')
+    except OSError:
+        return False
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            if stat is None:
+                # mkstemp создает файл с правами 0600, а open(path, 'w') — с 0666 за вычетом umask
+                umask = os.umask(0)
+                os.umask(umask)
+                os.chmod(temp_path, 0o666 & ~umask)
+            else:
+                os.chmod(temp_path, stat.st_mode & 0o7777)
+                temp_stat = os.fstat(file.fileno())
+                if (temp_stat.st_uid, temp_stat.st_gid) != (stat.st_uid, stat.st_gid):
+                    try:
+                        os.chown(temp_path, stat.st_uid, stat.st_gid)
+                    except (OSError, AttributeError):
+                        os.remove(temp_path)
+                        return False
+            _write_stream(file, file_path, text, file_format, chunk_size)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return True
+
+
+def write_text(file_path: str, text: str, file_format: FileFormat,
+               chunk_size: int = CHUNK_SIZE) -> None:
+    """
+    Записывает текст в файл с указанными сжатием, кодировкой, BOM и переводами строк.
+
+    Данные кодируются и сжимаются по частям во временный файл рядом с целевым,
+    который затем заменяет целевой. Символьные ссылки разыменовываются. Если
+    временный файл использовать нельзя (жесткие ссылки, чужой владелец, каталог
+    только для чтения), файл перезаписывается на месте после пробного
+    кодирования, поэтому при ошибке кодирования исходный файл не портится.
+
+    :param file_path: Путь к файлу.
+    :param text: Текст с переводами строк '\\n'.
+    :param file_format: Формат записи.
+    :param chunk_size: Размер кодируемых за раз частей текста в символах.
+    """
+    file_path = os.path.realpath(file_path)
+    if _replace_via_temp(file_path, text, file_format, chunk_size):
+        return
+    for _ in _encode_chunks(text, file_format, chunk_size):
+        pass
+    with open(file_path, 'wb') as file:
+        _write_stream(file, file_path, text, file_format, chunk_size)
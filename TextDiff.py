@@ -0,0 +1,257 @@
+import bisect
+import time
+from typing import Optional
+
+
+# Операции в формате difflib.SequenceMatcher.get_opcodes()
+Opcode = tuple[str, int, int, int, int]
+
+# Участки длиннее этого (в сумме строк обоих текстов) сначала делятся по опорным строкам
+ANCHOR_THRESHOLD = 1024
+
+
+def hash_lines(old_lines: list[str], new_lines: list[str]) -> tuple[list[int], list[int]]:
+    """
+    Заменяет строки целочисленными идентификаторами.
+
+    Одинаковые строки получают одинаковый идентификатор, поэтому при сравнении
+    последовательностей сравниваются числа, а не строки целиком.
+
+    :param old_lines: Строки исходного текста.
+    :param new_lines: Строки нового текста.
+    :return: Пара списков идентификаторов строк.
+    """
+    ids: dict[str, int] = {}
+    old_ids = [ids.setdefault(line, len(ids)) for line in old_lines]
+    new_ids = [ids.setdefault(line, len(ids)) for line in new_lines]
+    return old_ids, new_ids
+
+
+def _bisect(a: list[int], a_lo: int, a_hi: int,
+            b: list[int], b_lo: int, b_hi: int,
+            deadline: Optional[float]) -> Optional[tuple[int, int]]:
+    """
+    Ищет точку разбиения на середине кратчайшего пути редактирования (алгоритм Майерса).
+
+    Прямой и обратный поиск идут навстречу друг другу, поэтому память
+    линейна по длине последовательностей.
+
+    :return: Точка разбиения (x, y) в координатах a и b или None, если время вышло.
+    """
+    n = a_hi - a_lo
+    m = b_hi - b_lo
+    max_d = (n + m + 1) // 2
+    v_offset = max_d
+    v_length = 2 * max_d + 2
+    v1 = [-1] * v_length
+    v1[v_offset + 1] = 0
+    v2 = v1[:]
+    delta = n - m
+    front = delta % 2 != 0
+    k1start = k1end = k2start = k2end = 0
+
+    for d in range(max_d):
+        if deadline is not None and time.monotonic() > deadline:
+            return None
+
+        # Прямой проход
+        for k1 in range(-d + k1start, d + 1 - k1end, 2):
+            k1_offset = v_offset + k1
+            if k1 == -d or (k1 != d and v1[k1_offset - 1] < v1[k1_offset + 1]):
+                x1 = v1[k1_offset + 1]
+            else:
+                x1 = v1[k1_offset - 1] + 1
+            y1 = x1 - k1
+            while x1 < n and y1 < m and a[a_lo + x1] == b[b_lo + y1]:
+                x1 += 1
+                y1 += 1
+            v1[k1_offset] = x1
+            if x1 > n:
+                k1end += 2
+            elif y1 > m:
+                k1start += 2
+            elif front:
+                k2_offset = v_offset + delta - k1
+                if 0 <= k2_offset < v_length and v2[k2_offset] != -1:
+                    if x1 >= n - v2[k2_offset]:
+                        return a_lo + x1, b_lo + y1
+
+        # Обратный проход
+        for k2 in range(-d + k2start, d + 1 - k2end, 2):
+            k2_offset = v_offset + k2
+            if k2 == -d or (k2 != d and v2[k2_offset - 1] < v2[k2_offset + 1]):
+                x2 = v2[k2_offset + 1]
+            else:
+                x2 = v2[k2_offset - 1] + 1
+            y2 = x2 - k2
+            while x2 < n and y2 < m and a[a_hi - x2 - 1] == b[b_hi - y2 - 1]:
+                x2 += 1
+                y2 += 1
+            v2[k2_offset] = x2
+            if x2 > n:
+                k2end += 2
+            elif y2 > m:
+                k2start += 2
+            elif not front:
+                k1_offset = v_offset + delta - k2
+                if 0 <= k1_offset < v_length and v1[k1_offset] != -1:
+                    x1 = v1[k1_offset]
+                    y1 = v_offset + x1 - k1_offset
+                    if x1 >= n - x2:
+                        return a_lo + x1, b_lo + y1
+
+    return None
+
+
+def _unique_anchors(a: list[int], a_lo: int, a_hi: int,
+                    b: list[int], b_lo: int, b_hi: int,
+                    deadline: Optional[float]) -> list[tuple[int, int]]:
+    """
+    Находит опорные строки: встречающиеся ровно один раз в каждом участке.
+
+    Из пар одинаковых уникальных строк выбирается самая длинная цепочка,
+    возрастающая в обоих текстах (сортировка «пасьянсом», как в patience/histogram diff).
+
+    :return: Опорные пары (x, y) в порядке следования; пустой список, если их нет или время вышло.
+    """
+    counts: dict[int, int] = {}
+    for line in a[a_lo:a_hi]:
+        counts[line] = counts.get(line, 0) + 1
+    positions_b: dict[int, int] = {}
+    for y in range(b_lo, b_hi):
+        line = b[y]
+        if counts.get(line) == 1:
+            positions_b[line] = -1 if line in positions_b else y
+    pairs = [(x, positions_b[a[x]]) for x in range(a_lo, a_hi) if positions_b.get(a[x], -1) >= 0]
+    if deadline is not None and time.monotonic() > deadline:
+        return []
+
+    # Наибольшая возрастающая по y подпоследовательность за O(k log k)
+    tails: list[int] = []
+    tail_index: list[int] = []
+    previous = [-1] * len(pairs)
+    for index, (_, y) in enumerate(pairs):
+        pos = bisect.bisect_left(tails, y)
+        if pos == len(tails):
+            tails.append(y)
+            tail_index.append(index)
+        else:
+            tails[pos] = y
+            tail_index[pos] = index
+        previous[index] = tail_index[pos - 1] if pos > 0 else -1
+
+    anchors = []
+    index = tail_index[-1] if tail_index else -1
+    while index >= 0:
+        anchors.append(pairs[index])
+        index = previous[index]
+    anchors.reverse()
+    return anchors
+
+
+def _merge_opcodes(ops: list[Opcode]) -> list[Opcode]:
+    """
+    Объединяет соседние операции одного типа и пары удаление/вставка в замену.
+
+    :param ops: Операции в порядке следования.
+    :return: Список операций без смежных дубликатов.
+    """
+    merged: list[Opcode] = []
+    for tag, i1, i2, j1, j2 in ops:
+        if i1 == i2 and j1 == j2:
+            continue
+        if merged:
+            prev_tag, pi1, pi2, pj1, pj2 = merged[-1]
+            if prev_tag == tag or (prev_tag != 'equal' and tag != 'equal'):
+                if prev_tag != tag:
+                    tag = 'replace'
+                merged[-1] = (tag, pi1, i2, pj1, j2)
+                continue
+        merged.append((tag, i1, i2, j1, j2))
+    # Замена с пустой стороной — это чистое удаление или вставка
+    return [
+        ('delete' if j1 == j2 else 'insert' if i1 == i2 else tag, i1, i2, j1, j2)
+        if tag == 'replace' else (tag, i1, i2, j1, j2)
+        for tag, i1, i2, j1, j2 in merged
+    ]
+
+
+def diff_lines(old_lines: list[str], new_lines: list[str],
+               timeout: Optional[float] = None) -> tuple[list[Opcode], bool]:
+    """
+    Сравнивает два списка строк: histogram-разбиение по уникальным строкам и алгоритм Майерса.
+
+    Строки сравниваются по идентификаторам из hash_lines. Общие начало и конец
+    отсекаются у каждого участка. Большие участки сначала делятся по
+    уникальным опорным строкам, как в patience/histogram diff, поэтому даже
+    многочисленные разрозненные правки дают мелкие участки, которые точно
+    сравниваются алгоритмом Майерса с линейной памятью. Таймаут ограничивает
+    всё сравнение: когда время выходит, оставшиеся участки помечаются
+    целиком как замена (грубый дифф).
+
+    :param old_lines: Строки исходного текста.
+    :param new_lines: Строки нового текста.
+    :param timeout: Ограничение времени в секундах, None — без ограничения.
+    :return: Операции в формате difflib и признак того, что дифф построен полностью, без таймаута.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    a, b = hash_lines(old_lines, new_lines)
+    if a and b and set(a).isdisjoint(b):
+        return [('replace', 0, len(a), 0, len(b))], True
+
+    complete = True
+    ops: list[Opcode] = []
+    # Явный стек вместо рекурсии: участки обрабатываются слева направо
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        a_lo, a_hi, b_lo, b_hi = stack.pop()
+
+        start_a, start_b = a_lo, b_lo
+        while a_lo < a_hi and b_lo < b_hi and a[a_lo] == b[b_lo]:
+            a_lo += 1
+            b_lo += 1
+        end_a, end_b = a_hi, b_hi
+        while a_lo < a_hi and b_lo < b_hi and a[a_hi - 1] == b[b_hi - 1]:
+            a_hi -= 1
+            b_hi -= 1
+
+        ops.append(('equal', start_a, a_lo, start_b, b_lo))
+        suffix = ('equal', a_hi, end_a, b_hi, end_b)
+
+        if a_lo == a_hi or b_lo == b_hi:
+            ops.append(('delete' if b_lo == b_hi else 'insert', a_lo, a_hi, b_lo, b_hi))
+            ops.append(suffix)
+            continue
+
+        if complete and deadline is not None and time.monotonic() > deadline:
+            complete = False
+        if not complete:
+            ops.append(('replace', a_lo, a_hi, b_lo, b_hi))
+            ops.append(suffix)
+            continue
+
+        if (a_hi - a_lo) + (b_hi - b_lo) > ANCHOR_THRESHOLD:
+            anchors = _unique_anchors(a, a_lo, a_hi, b, b_lo, b_hi, deadline)
+            if anchors:
+                # Каждый промежуток начинается со своей опорной строки, она уйдет в общее начало.
+                # Общий конец кладется в стек первым, чтобы попасть в вывод после всех промежутков
+                stack.append((a_hi, end_a, b_hi, end_b))
+                bounds = [(a_lo, b_lo)] + anchors + [(a_hi, b_hi)]
+                for (x1, y1), (x2, y2) in reversed(list(zip(bounds, bounds[1:]))):
+                    stack.append((x1, x2, y1, y2))
+                continue
+
+        split = _bisect(a, a_lo, a_hi, b, b_lo, b_hi, deadline)
+        if split is not None:
+            x, y = split
+            stack.append((a_hi, end_a, b_hi, end_b))
+            stack.append((x, a_hi, y, b_hi))
+            stack.append((a_lo, x, b_lo, y))
+            continue
+
+        if deadline is not None and time.monotonic() > deadline:
+            complete = False
+        ops.append(('replace', a_lo, a_hi, b_lo, b_hi))
+        ops.append(suffix)
+
+    return _merge_opcodes(ops), complete
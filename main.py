@@ -1,10 +1,14 @@
 import sys
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QTextEdit, QAction, QToolBar,
-    QFileDialog, QFontDialog, QColorDialog, QDialog, QVBoxLayout, QLabel, QLineEdit, QPushButton
+    QFileDialog, QFontDialog, QColorDialog, QDialog, QVBoxLayout, QLabel, QLineEdit, QPushButton,
+    QMessageBox
 )
 from PyQt5.QtGui import QTextCharFormat, QFont, QTextCursor, QColor
-from PyQt5.QtCore import pyqtSignal, QObject
+from PyQt5.QtCore import Qt, pyqtSignal, QObject, QThread
+
+from DiffView import DiffPanel
+from FileIO import FileFormat, TextReader, compression_from_extension, write_text
 
 
 # Паттерн Command
@@ -123,6 +127,36 @@ class Document(QObject):
         return self._text
 
 
+# Потоковая загрузка файлов
+class FileLoader(QThread):
+    """Поток, который читает файл по частям, распаковывая и декодируя его на лету."""
+
+    chunk_loaded = pyqtSignal(str)
+    loaded = pyqtSignal(object)
+    load_failed = pyqtSignal(str)
+
+    def __init__(self, file_path: str) -> None:
+        """
+        Инициализация потока.
+
+        :param file_path: Путь к файлу.
+        """
+        super().__init__()
+        self.file_path = file_path
+
+    def run(self) -> None:
+        """Отправляет части текста сигналом chunk_loaded, а формат файла — сигналом loaded."""
+        try:
+            with TextReader(self.file_path) as reader:
+                for chunk in reader.chunks():
+                    if self.isInterruptionRequested():
+                        return
+                    self.chunk_loaded.emit(chunk)
+                self.loaded.emit(reader.format)
+        except Exception as error:
+            self.load_failed.emit(str(error))
+
+
 # Паттерн Bridge
 class WidgetImplementation:
     """Абстрактный базовый класс для реализации виджетов."""
@@ -430,6 +464,15 @@ class MainWindow(QMainWindow):
         self.document = Document()
         self.document.text_changed.connect(self.on_text_changed)
 
+        self.file_path = None
+        self.file_format = FileFormat()
+        self.loader = None
+        # В редакторе только часть файла, чтение которого прервалось ошибкой
+        self.partial = False
+        self.diff_panel = DiffPanel(self)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.diff_panel)
+        self.diff_panel.hide()
+
         self.init_ui()
 
     def init_ui(self) -> None:
@@ -462,6 +505,10 @@ class MainWindow(QMainWindow):
         replace_action.triggered.connect(self.replace_text)
         toolbar.addAction(replace_action)
 
+        diff_action = QAction("Diff", self)
+        diff_action.triggered.connect(self.show_diff)
+        toolbar.addAction(diff_action)
+
         # Увеличение размера шрифта кнопок тулбара
         toolbar.setStyleSheet("QToolBar {font-size: 24px;}")
 
@@ -481,26 +528,162 @@ class MainWindow(QMainWindow):
         """
         self.statusBar().showMessage("Document modified")
 
+    def closeEvent(self, event) -> None:
+        """Прерывает загрузку файла и дожидается сравнения перед закрытием окна."""
+        self.stop_loading()
+        self.diff_panel.stop()
+        super().closeEvent(event)
+
     def open_file(self) -> None:
         """Открывает файл и загружает его содержимое в QTextEdit."""
         open_dialog = OpenFileDialogFactory().create_dialog()
         file_path, _ = open_dialog
         if file_path:
-            with open(file_path, 'r') as file:
-                text = file.read()
-                self.execute_command(TextEditCommand(self.text_edit, text))
-                self.document.set_text(text)
+            self.stop_loading()
+            self.partial = False
+            self.execute_command(TextEditCommand(self.text_edit, ""))
+            self.text_edit.setReadOnly(True)
+            self.text_edit.setUndoRedoEnabled(False)
+            self.statusBar().showMessage("Loading...")
+
+            self.loader = FileLoader(file_path)
+            self.loader.chunk_loaded.connect(self.append_chunk)
+            self.loader.loaded.connect(self.on_file_loaded)
+            self.loader.load_failed.connect(self.on_load_failed)
+            self.loader.start()
+
+    def stop_loading(self) -> None:
+        """Прерывает загрузку файла, если она еще идет."""
+        if self.loader is not None and self.loader.isRunning():
+            self.loader.chunk_loaded.disconnect()
+            self.loader.loaded.disconnect()
+            self.loader.load_failed.disconnect()
+            self.loader.requestInterruption()
+            self.loader.wait()
+        self.loader = None
+
+    def append_chunk(self, chunk: str) -> None:
+        """
+        Добавляет загруженную часть текста в конец QTextEdit.
+
+        :param chunk: Часть текста файла.
+        """
+        # Части прерванной загрузки, уже стоящие в очереди событий, пропускаются
+        if self.sender() is not self.loader:
+            return
+        cursor = QTextCursor(self.text_edit.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(chunk)
+
+    def on_file_loaded(self, file_format: FileFormat) -> None:
+        """
+        Завершает загрузку файла.
+
+        :param file_format: Сжатие, кодировка и переводы строк файла.
+        """
+        # Сигнал завершившейся прежней загрузки мог прийти после открытия нового файла
+        if self.sender() is not self.loader:
+            return
+        self.file_path = self.loader.file_path
+        self.loader = None
+        self.text_edit.setReadOnly(False)
+        self.text_edit.setUndoRedoEnabled(True)
+        self.file_format = file_format
+        self.document.set_text(self.text_edit.toPlainText())
+        if file_format.lossy:
+            self.statusBar().showMessage(
+                f"Some bytes could not be decoded as {file_format.encoding} and were replaced"
+            )
+
+    def on_load_failed(self, message: str) -> None:
+        """
+        Сообщает об ошибке загрузки файла.
+
+        :param message: Текст ошибки.
+        """
+        if self.sender() is not self.loader:
+            return
+        self.loader = None
+        self.file_path = None
+        self.file_format = FileFormat()
+        self.text_edit.setUndoRedoEnabled(True)
+        if self.text_edit.document().isEmpty():
+            self.text_edit.setReadOnly(False)
+            self.statusBar().showMessage(f"Cannot open file: {message}")
+        else:
+            # Прочитанная до ошибки часть остается только для просмотра
+            self.partial = True
+            self.statusBar().showMessage(f"Cannot read the whole file, partial text is read-only: {message}")
 
     def save_file(self) -> None:
         """Сохраняет текущее содержимое QTextEdit в файл."""
+        if self.loader is not None:
+            self.statusBar().showMessage("File is still loading")
+            return
         save_dialog = SaveFileDialogFactory().create_dialog()
         file_path, _ = save_dialog
         if file_path:
-            with open(file_path, 'w') as file:
-                text = self.text_edit.toPlainText()
-                file.write(text)
-                self.document.set_text(text)
-                self.statusBar().showMessage("File saved")
+            if self.partial:
+                answer = QMessageBox.warning(
+                    self, "Save",
+                    "The editor holds only the part of the file read before the error.\n"
+                    "Saving will write only this part. Continue?",
+                    QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+                )
+                if answer != QMessageBox.Yes:
+                    return
+            file_format = self.file_format
+            if file_path != self.file_path:
+                # Кодировка сохраняется, а сжатие выбирается по расширению нового файла
+                file_format = FileFormat(
+                    compression_from_extension(file_path), file_format.encoding,
+                    file_format.bom, file_format.newline
+                )
+            elif file_format.lossy:
+                answer = QMessageBox.warning(
+                    self, "Save",
+                    f"Some bytes of this file could not be decoded as {file_format.encoding}.\n"
+                    "Overwriting it will replace them with U+FFFD. Continue?",
+                    QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+                )
+                if answer != QMessageBox.Yes:
+                    return
+            text = self.text_edit.toPlainText()
+            try:
+                try:
+                    write_text(file_path, text, file_format)
+                except UnicodeEncodeError:
+                    answer = QMessageBox.question(
+                        self, "Save",
+                        f"Text cannot be saved in {file_format.encoding}. Save as UTF-8?",
+                        QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+                    )
+                    if answer != QMessageBox.Yes:
+                        self.statusBar().showMessage(f"Text cannot be saved in {file_format.encoding}")
+                        return
+                    file_format = FileFormat(file_format.compression, 'utf-8', b'', file_format.newline)
+                    write_text(file_path, text, file_format)
+            except OSError as error:
+                self.statusBar().showMessage(f"Cannot save file: {error}")
+                return
+            self.document.set_text(text)
+            self.file_path = file_path
+            self.partial = False
+            self.text_edit.setReadOnly(False)
+            # Замененные байты записаны как U+FFFD, файл больше не отличается от буфера
+            file_format.lossy = False
+            self.file_format = file_format
+            self.statusBar().showMessage("File saved")
+
+    def show_diff(self) -> None:
+        """Показывает отличия текста в QTextEdit от сохраненного на диске файла."""
+        if self.loader is not None:
+            self.statusBar().showMessage("File is still loading")
+            return
+        if not self.file_path:
+            self.statusBar().showMessage("No file to compare with")
+            return
+        self.diff_panel.compare(self.file_path, self.text_edit.toPlainText())
 
     def choose_font(self) -> None:
         """Открывает диалог выбора шрифта и применяет выбранный шрифт к выделенному тексту."""
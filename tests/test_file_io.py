@@ -0,0 +1,157 @@
+import bz2
+import codecs
+import gzip
+import lzma
+import os
+import stat
+
+import pytest
+
+from FileIO import SAMPLE_SIZE, FileFormat, TextReader, read_text, write_text
+
+
+COMPRESSORS = {
+    None: (lambda data: data, lambda data: data),
+    'gzip': (gzip.compress, gzip.decompress),
+    'xz': (lzma.compress, lzma.decompress),
+    'bz2': (bz2.compress, bz2.decompress),
+}
+
+is_root = hasattr(os, 'geteuid') and os.geteuid() == 0
+
+
+@pytest.mark.parametrize('compression', list(COMPRESSORS))
+@pytest.mark.parametrize('encoding, bom', [
+    ('utf-8', b''),
+    ('utf-8', codecs.BOM_UTF8),
+    ('cp1251', b''),
+    ('utf-16-le', b''),
+    ('utf-16-be', codecs.BOM_UTF16_BE),
+    ('utf-32-le', codecs.BOM_UTF32_LE),
+])
+@pytest.mark.parametrize('newline', ['\n', '\r\n'])
+def test_round_trip(tmp_path, compression, encoding, bom, newline):
+    compress, decompress = COMPRESSORS[compression]
+    text = "Привет, мир\nline two\n" * 5000
+    raw = bom + text.replace('\n', newline).encode(encoding)
+    path = tmp_path / 'file'
+    path.write_bytes(compress(raw))
+
+    loaded, file_format = read_text(str(path))
+    assert loaded == text
+    assert file_format == FileFormat(compression, encoding, bom, newline)
+
+    write_text(str(path), loaded, file_format)
+    assert decompress(path.read_bytes()) == raw
+
+
+def test_chunks_are_streamed(tmp_path):
+    path = tmp_path / 'file.gz'
+    path.write_bytes(gzip.compress(b'line\r\n' * 100000))
+    with TextReader(str(path), chunk_size=4097) as reader:
+        chunks = list(reader.chunks())
+    assert len(chunks) > 2
+    assert ''.join(chunks) == 'line\n' * 100000
+
+
+def test_undecodable_bytes_after_sample_mark_format_lossy(tmp_path):
+    path = tmp_path / 'file'
+    path.write_bytes(b'a' * (SAMPLE_SIZE + 10) + b'caf\xe9\n')
+    text, file_format = read_text(str(path))
+    assert file_format.encoding == 'utf-8'
+    assert file_format.lossy
+    assert text.endswith('caf�\n')
+
+
+def test_crlf_split_at_sample_boundary(tmp_path):
+    path = tmp_path / 'file'
+    path.write_bytes(b'a' * (SAMPLE_SIZE - 1) + b'\r\nb\r\n')
+    assert read_text(str(path))[1].newline == '\r\n'
+
+
+def test_text_that_looks_compressed(tmp_path):
+    path = tmp_path / 'file'
+    path.write_bytes(b'BZhello world\n')
+    text, file_format = read_text(str(path))
+    assert text == 'BZhello world\n'
+    assert file_format.compression is None
+
+
+def test_single_byte_encodings(tmp_path):
+    path = tmp_path / 'file'
+    path.write_bytes('Café naïve façade\n'.encode('latin-1'))
+    assert read_text(str(path))[0] == 'Café naïve façade\n'
+    path.write_bytes('Привет мир, hello world\n'.encode('cp1251'))
+    assert read_text(str(path)) == ('Привет мир, hello world\n', FileFormat(None, 'cp1251', b'', '\n'))
+
+
+def test_unencodable_text_keeps_original(tmp_path):
+    path = tmp_path / 'file'
+    path.write_bytes(b'old')
+    with pytest.raises(UnicodeEncodeError):
+        write_text(str(path), '日本', FileFormat(encoding='cp1251'))
+    assert path.read_bytes() == b'old'
+    assert os.listdir(tmp_path) == ['file']
+
+
+@pytest.mark.skipif(not hasattr(os, 'symlink'), reason="symlinks are not supported")
+def test_symlink_is_followed(tmp_path):
+    target = tmp_path / 'target'
+    target.write_bytes(b'x')
+    link = tmp_path / 'link'
+    os.symlink(target, link)
+    write_text(str(link), 'y', FileFormat(newline='\n'))
+    assert link.is_symlink()
+    assert target.read_bytes() == b'y'
+
+
+def test_hard_link_is_kept(tmp_path):
+    target = tmp_path / 'target'
+    target.write_bytes(b'x')
+    os.link(target, tmp_path / 'hard')
+    write_text(str(tmp_path / 'hard'), 'y', FileFormat(newline='\n'))
+    assert target.read_bytes() == b'y'
+    assert os.stat(target).st_nlink == 2
+
+
+@pytest.mark.skipif(os.name != 'posix', reason="POSIX permissions")
+def test_new_file_mode_follows_umask(tmp_path):
+    old_umask = os.umask(0o022)
+    try:
+        write_text(str(tmp_path / 'new.txt'), 'text', FileFormat())
+    finally:
+        os.umask(old_umask)
+    assert stat.S_IMODE(os.stat(tmp_path / 'new.txt').st_mode) == 0o644
+
+
+@pytest.mark.skipif(os.name != 'posix', reason="POSIX permissions")
+def test_existing_file_mode_is_kept(tmp_path):
+    path = tmp_path / 'script'
+    path.write_bytes(b'old')
+    os.chmod(path, 0o754)
+    write_text(str(path), 'new', FileFormat())
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o754
+
+
+@pytest.mark.skipif(os.name != 'posix' or is_root, reason="root ignores file permissions")
+def test_read_only_file_is_not_replaced(tmp_path):
+    path = tmp_path / 'file'
+    path.write_bytes(b'old')
+    os.chmod(path, 0o444)
+    with pytest.raises(PermissionError):
+        write_text(str(path), 'new', FileFormat())
+    assert path.read_bytes() == b'old'
+
+
+@pytest.mark.skipif(os.name != 'posix' or is_root, reason="root ignores file permissions")
+def test_read_only_directory_writes_in_place(tmp_path):
+    directory = tmp_path / 'dir'
+    directory.mkdir()
+    path = directory / 'file'
+    path.write_bytes(b'old')
+    os.chmod(directory, 0o555)
+    try:
+        write_text(str(path), 'new', FileFormat(newline='\n'))
+    finally:
+        os.chmod(directory, 0o755)
+    assert path.read_bytes() == b'new'
@@ -0,0 +1,80 @@
+import random
+
+from TextDiff import diff_lines
+
+
+def apply_opcodes(old_lines, new_lines, opcodes):
+    """Проверяет, что операции покрывают оба текста подряд, и восстанавливает новый текст."""
+    result = []
+    i = j = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        assert (i1, j1) == (i, j)
+        if tag == 'equal':
+            assert old_lines[i1:i2] == new_lines[j1:j2]
+        elif tag == 'delete':
+            assert i1 < i2 and j1 == j2
+        elif tag == 'insert':
+            assert i1 == i2 and j1 < j2
+        else:
+            assert tag == 'replace' and i1 < i2 and j1 < j2
+        result.extend(new_lines[j1:j2])
+        i, j = i2, j2
+    assert (i, j) == (len(old_lines), len(new_lines))
+    return result
+
+
+def lcs_length(old_lines, new_lines):
+    """Длина наибольшей общей подпоследовательности динамическим программированием."""
+    previous = [0] * (len(new_lines) + 1)
+    for old_line in old_lines:
+        current = [0]
+        for j, new_line in enumerate(new_lines):
+            current.append(previous[j] + 1 if old_line == new_line else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+def random_lines(rng, size):
+    return [str(rng.randint(0, 5)) for _ in range(rng.randint(0, size))]
+
+
+def test_small_diffs_are_minimal():
+    rng = random.Random(1)
+    for _ in range(1000):
+        old_lines, new_lines = random_lines(rng, 20), random_lines(rng, 20)
+        opcodes, complete = diff_lines(old_lines, new_lines)
+        assert complete
+        assert apply_opcodes(old_lines, new_lines, opcodes) == new_lines
+        equal = sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag == 'equal')
+        assert equal == lcs_length(old_lines, new_lines)
+
+
+def test_expired_timeout_gives_valid_coarse_diff():
+    rng = random.Random(2)
+    for _ in range(500):
+        old_lines, new_lines = random_lines(rng, 40), random_lines(rng, 40)
+        opcodes, _ = diff_lines(old_lines, new_lines, timeout=-1)
+        assert apply_opcodes(old_lines, new_lines, opcodes) == new_lines
+
+
+def test_large_file_with_scattered_edits():
+    rng = random.Random(3)
+    old_lines = [f"line {i}" for i in range(20000)]
+    new_lines = old_lines[:]
+    for i in range(0, len(new_lines), 10):
+        new_lines[i] = f"edited {i}"
+    opcodes, complete = diff_lines(old_lines, new_lines, timeout=5)
+    assert complete
+    assert apply_opcodes(old_lines, new_lines, opcodes) == new_lines
+    assert sum(1 for tag, *_ in opcodes if tag == 'replace') == 2000
+
+    rng.shuffle(new_lines)
+    opcodes, _ = diff_lines(old_lines, new_lines, timeout=0.1)
+    assert apply_opcodes(old_lines, new_lines, opcodes) == new_lines
+
+
+def test_edge_cases():
+    assert diff_lines([], []) == ([], True)
+    assert diff_lines([], ['a']) == ([('insert', 0, 0, 0, 1)], True)
+    assert diff_lines(['a'], []) == ([('delete', 0, 1, 0, 0)], True)
+    assert diff_lines(['a', 'b'], ['c', 'd']) == ([('replace', 0, 2, 0, 2)], True)